@@ -1,3 +1,5 @@
+import hmac
+
 from fastapi import APIRouter, HTTPException, Security
 from fastapi.security import APIKeyHeader
 
@@ -9,9 +11,12 @@ router = APIRouter()
 # 定义一个依赖项，用于从请求头 X-Admin-Password 中获取密码
 api_key_header = APIKeyHeader(name="X-Admin-Password", auto_error=False)
 
+# 预先编码，避免每次请求重复 encode
+_ADMIN_PASSWORD_BYTES = ADMIN_PASSWORD.encode()
+
 def verify_password(password: str = Security(api_key_header)):
-    """校验密码"""
-    if not password or password != ADMIN_PASSWORD:
+    """校验密码（常数时间比较，避免时序侧信道）"""
+    if not password or not hmac.compare_digest(password.encode(), _ADMIN_PASSWORD_BYTES):
         raise HTTPException(status_code=403, detail="Forbidden: Invalid or missing admin password.")
     return True
 
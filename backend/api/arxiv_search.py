@@ -1,4 +1,5 @@
 import uuid
+from collections import deque
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import date
@@ -7,7 +8,7 @@ from fastapi import APIRouter, BackgroundTasks, HTTPException
 from fastapi.responses import FileResponse
 from pathlib import Path
 
-from config import background_tasks, DEFAULT_KEYWORDS, DEFAULT_MAX_RESULTS_PER_KEYWORD
+from config import background_tasks, DEFAULT_KEYWORDS, DEFAULT_MAX_RESULTS_PER_KEYWORD, SUMMARY_MAX_LINES
 from core.arxiv_logic import run_arxiv_search_and_process
 
 router = APIRouter()
@@ -34,7 +35,7 @@ async def start_arxiv_search(
     background_tasks[run_id] = {
         "status": "processing",
         "run_id": run_id,
-        "summary": ["INFO: 任务已创建，正在验证参数并准备开始..."],
+        "summary": deque(["INFO: 任务已创建，正在验证参数并准备开始..."], maxlen=SUMMARY_MAX_LINES),
         "output_path": None,
         "request_params": request.dict() # 存储请求参数供日志和调试
     }
@@ -54,7 +55,7 @@ async def get_search_status(run_id: str):
     response = {
         "run_id": run_id,
         "status": task["status"],
-        "summary": task["summary"],
+        "summary": list(task["summary"]),
         "download_url": f"/api/arxiv/download_result/{run_id}" if task["status"] == "completed" else None
     }
     return response
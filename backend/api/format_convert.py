@@ -1,11 +1,13 @@
 import uuid
-import shutil
+from collections import deque
 from pathlib import Path
 
+import aiofiles
+
 from fastapi import APIRouter, File, UploadFile, BackgroundTasks, HTTPException
 from fastapi.responses import FileResponse
 
-from config import uploads_dir, conversion_tasks
+from config import uploads_dir, conversion_tasks, SUMMARY_MAX_LINES
 from core.format_convert import convert_paper_format_logic
 
 router = APIRouter()
@@ -22,21 +24,20 @@ async def create_conversion_task(
     content_path = uploads_dir / f"{run_id}_content{''.join(Path(content_file.filename).suffixes)}"
     format_path = uploads_dir / f"{run_id}_format{''.join(Path(format_file.filename).suffixes)}"
     
-    # 保存上传的文件
-    try:
-        with open(content_path, "wb") as buffer:
-            shutil.copyfileobj(content_file.file, buffer)
-        with open(format_path, "wb") as buffer:
-            shutil.copyfileobj(format_file.file, buffer)
-    finally:
-        content_file.file.close()
-        format_file.file.close()
-        
+    # 保存上传的文件 (1 MiB 分块异步写入，避免阻塞事件循环)
+    async with aiofiles.open(content_path, "wb") as buffer:
+        while chunk := await content_file.read(1 << 20):
+            await buffer.write(chunk)
+    async with aiofiles.open(format_path, "wb") as buffer:
+        while chunk := await format_file.read(1 << 20):
+            await buffer.write(chunk)
+
+
     # 初始化任务状态
     conversion_tasks[run_id] = {
         "status": "processing",
         "run_id": run_id,
-        "summary": ["INFO: 任务已创建，正在排队等待处理..."],
+        "summary": deque(["INFO: 任务已创建，正在排队等待处理..."], maxlen=SUMMARY_MAX_LINES),
         "output_path": None
     }
     
@@ -55,7 +56,7 @@ async def get_conversion_status(run_id: str):
     response = {
         "run_id": run_id,
         "status": task["status"],
-        "summary": task["summary"],
+        "summary": list(task["summary"]),
         "download_url": f"/api/latex_format/download/{run_id}" if task["status"] == "completed" else None
     }
     return response
@@ -1,10 +1,11 @@
 import uuid
+from collections import deque
 from typing import List, Optional, Dict
 from pydantic import BaseModel, Field
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 
-from config import style_transfer_tasks
+from config import style_transfer_tasks, SUMMARY_MAX_LINES
 from core.style_transfer_logic import run_style_transfer_logic
 
 router = APIRouter()
@@ -37,7 +38,7 @@ async def start_style_transfer_task(
     style_transfer_tasks[run_id] = {
         "status": "processing",
         "run_id": run_id,
-        "summary": ["INFO: 任务已创建，正在准备执行文本润色..."],
+        "summary": deque(["INFO: 任务已创建，正在准备执行文本润色..."], maxlen=SUMMARY_MAX_LINES),
         "result": None
     }
     
@@ -58,9 +59,13 @@ async def get_style_transfer_status(run_id: str):
     response = {
         "run_id": run_id,
         "status": task["status"],
-        "summary": task["summary"],
+        "summary": list(task["summary"]),
         "result_url": f"/api/style_transfer/results/{run_id}" if task["status"] == "completed" else None
     }
+    # 专业模式生成期间暴露各轮的部分输出，前端可以实时渲染
+    stream_buffer = task.get("stream_buffer")
+    if stream_buffer is not None:
+        response["stream_buffer"] = list(stream_buffer)
     return response
 
 @router.get("/api/style_transfer/results/{run_id}", response_model=StyleTransferResponse, tags=["Style Transfer"], summary="获取文本润色结果")
@@ -1,21 +1,32 @@
 import os
+import asyncio
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 from typing import Dict
 
+import httpx
+from cachetools import TTLCache
+from openai import AsyncOpenAI
+
 # --- 用户需要配置的参数 ---
 # 建议使用环境变量或安全的密钥管理服务
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "sk-xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx")
 OPENAI_API_BASE = os.getenv("apibase", "https://api.openai.com/v1")
 MODEL_NAME = os.getenv("qwen3", "qwen3-4b")
+# 判别型调用（挑选最佳结果、生成修改建议）可以配置一个更小更快的
+# 模型，不影响创作质量；默认与主模型一致
+SUGGESTIONS_MODEL_NAME = os.getenv("SUGGESTIONS_MODEL_NAME", MODEL_NAME)
 
 # 全局重试次数
 MAX_RETRIES = 3
 
-# 管理接口的密码
-ADMIN_PASSWORD = "jinyi6"
+# 管理接口的密码（优先读环境变量，轮换密码无需改代码重新部署）
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "jinyi6")
 
 # --- arXiv 搜索和翻译的默认配置 ---
 # 这些值可以在 API 请求中被覆盖
@@ -24,6 +35,31 @@ DEFAULT_MAX_RESULTS_PER_KEYWORD = 10
 TRANSLATION_BATCH_SIZE = 5 # 一次并发翻译的摘要数量
 MAX_CONCURRENT_TRANSLATIONS = 3 # 最大并发 OpenAI API 调用数
 
+# 全服务共享的 OpenAI 并发上限。此前每个任务各建一个信号量，
+# N 个并发任务会放出 N x MAX_CONCURRENT_TRANSLATIONS 个并发请求，
+# 容易触发限流；改为全局信号量后整个服务的并发被统一限制。
+OPENAI_SEMAPHORE = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
+
+# --- 任务存储的容量上限 ---
+TASK_STORE_MAXSIZE = 10000 # 最多保留的任务条目数
+TASK_STORE_TTL_SECONDS = 24 * 3600 # 任务条目的保留时长（秒）
+SUMMARY_MAX_LINES = 500 # 每个任务 summary 日志保留的最大行数
+
+
+
+# --- 共享的 OpenAI 异步客户端 ---
+# 所有后台任务复用同一个客户端和连接池，省去每个任务各自的
+# TCP/TLS 握手与客户端初始化；HTTP/2 让并发调用复用同一条连接。
+# 应用关闭时由 main.py 的 shutdown 钩子负责 close。
+aclient = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    base_url=OPENAI_API_BASE,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+        timeout=60
+    )
+)
 
 
 # --- 目录设置 ---
@@ -35,29 +71,96 @@ workspace_dir = log_dir / "workspace"
 
 
 # --- 日志配置 ---
+# 日志监听线程，由 setup_logging 启动、stop_logging 停止
+_log_listener = None
+
 def setup_logging():
-    """配置日志记录器"""
+    """配置日志记录器。
+
+    文件/终端 handler 挂在一个独立线程的 QueueListener 上，请求路径里的
+    logging 调用只是往队列里入队，不再在持有 GIL 时做同步磁盘 I/O。
+    """
+    global _log_listener
     log_dir.mkdir(exist_ok=True)
     uploads_dir.mkdir(exist_ok=True)
     outputs_dir.mkdir(exist_ok=True)
     workspace_dir.mkdir(exist_ok=True)
-    
+
     log_file_name = f"{datetime.now().strftime('%Y-%m-%d')}.log"
     log_file_path = log_dir / log_file_name
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - [%(funcName)s] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[logging.FileHandler(log_file_path, 'a', 'utf-8'), logging.StreamHandler(sys.stdout)],
-        force=True
+
+    formatter = logging.Formatter(
+        fmt='%(asctime)s - %(levelname)s - [%(funcName)s] - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
     )
+    file_handler = logging.FileHandler(log_file_path, 'a', 'utf-8')
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    # 入队时不做格式化，由监听线程上的 handler 统一格式化
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    if _log_listener is not None:
+        _log_listener.stop()
+    _log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler], force=True)
     logging.info("Logging configured.")
     if "xxxxxxxx" in OPENAI_API_KEY:
         logging.warning("警告: 您似乎正在使用一个占位符API密钥。请将 'OPENAI_API_KEY' 设置为您的真实密钥。")
 
+def stop_logging():
+    """停止日志监听线程，并冲刷剩余日志"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 # --- 全局变量 ---
-# 模拟数据库来存储每个任务的状态
-conversion_tasks: Dict[str, Dict] = {}
-background_tasks: Dict[str, Dict] = {}
-style_transfer_tasks: Dict[str, Dict] = {} 
+# 模拟数据库来存储每个任务的状态。
+# 当前部署是单进程 uvicorn，直接引入 Redis + 任务队列 (arq/Celery) 收益有限；
+# 存储的创建收敛到一个工厂函数，之后若要换成外部存储只需改这一处。
+class _TaskStore(TTLCache):
+    """带容量和 TTL 上限的任务状态存储。
+
+    旧实现是普通字典，任务条目永不清理，长时间运行会无限泄漏内存。
+    cachetools 的缓存在并发读写下不是线程安全的（部分后台任务运行在
+    线程池中），因此所有访问都加锁；条目被删除或驱逐时顺带清理它在
+    磁盘上的输出文件。
+    """
+
+    def __init__(self):
+        super().__init__(maxsize=TASK_STORE_MAXSIZE, ttl=TASK_STORE_TTL_SECONDS)
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            try:
+                task = super().__getitem__(key)
+            except KeyError:
+                task = None
+            super().__delitem__(key)
+        if isinstance(task, dict) and task.get("output_path"):
+            Path(task["output_path"]).unlink(missing_ok=True)
+
+
+def _new_task_store() -> Dict[str, Dict]:
+    """创建一个任务状态存储"""
+    return _TaskStore()
+
+conversion_tasks: Dict[str, Dict] = _new_task_store()
+background_tasks: Dict[str, Dict] = _new_task_store()
+style_transfer_tasks: Dict[str, Dict] = _new_task_store()
 
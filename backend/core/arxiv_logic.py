@@ -1,56 +1,146 @@
-import arxiv
 import csv
-import time
 import os
 import asyncio
+import hashlib
+import io
 import logging
+import pickle
 import re
 import math
 import random
 from datetime import datetime, date
+from functools import lru_cache
 from pathlib import Path
 import shutil
-from openai import AsyncOpenAI
+
+import xml.etree.ElementTree as ET
+
+import aiohttp
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
+from openai import APIConnectionError, APITimeoutError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 # 假设您的 config.py 文件在同一个目录下
 from config import (
-    background_tasks, outputs_dir, workspace_dir,
-    OPENAI_API_KEY, OPENAI_API_BASE, MODEL_NAME,
-    MAX_CONCURRENT_TRANSLATIONS
+    aclient, background_tasks, outputs_dir, workspace_dir, MODEL_NAME,
+    MAX_RETRIES, TRANSLATION_BATCH_SIZE, OPENAI_SEMAPHORE
 )
 
+# 批量翻译时用于拼接/拆分摘要的编号分隔符，如 <<1>>、<<2>>
+_BATCH_DELIM_RE = re.compile(r"<<(\d+)>>")
+
+# arXiv Atom API 入口；官方使用规范要求每 3 秒最多发送 1 个请求，
+# 用令牌桶限流器在并发搜索之间统一执行这一约束
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+_ARXIV_LIMITER = AsyncLimiter(1, 3)
+
+# Atom 命名空间前缀
+_ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+def _parse_atom_feed(feed_text: str) -> list:
+    """解析 arXiv 的 Atom 响应，只抽取我们实际存储的字段。
+
+    相比 feedparser 的通用 feed 解析（构建大量用不到的惰性属性），
+    直接用 ElementTree 按字段抽取要快得多，也少一个第三方依赖。
+    """
+    entries = []
+    for entry in ET.fromstring(feed_text).iterfind(f"{_ATOM_NS}entry"):
+        pdf_link = None
+        for link in entry.iterfind(f"{_ATOM_NS}link"):
+            if link.get("type") == "application/pdf":
+                pdf_link = link.get("href")
+                break
+        entries.append({
+            "id": entry.findtext(f"{_ATOM_NS}id", ""),
+            "title": entry.findtext(f"{_ATOM_NS}title", ""),
+            "summary": (entry.findtext(f"{_ATOM_NS}summary") or "").strip(),
+            "published": entry.findtext(f"{_ATOM_NS}published", ""),
+            "authors": [a.findtext(f"{_ATOM_NS}name", "") for a in entry.iterfind(f"{_ATOM_NS}author")],
+            "pdf_link": pdf_link,
+        })
+    return entries
+
+# 按 (查询, 日期范围, max_results) 缓存已解析的检索结果。
+# 用户经常只换 target_language 重跑同一组关键词，命中缓存可以
+# 完全省掉 HTTP 往返和限流等待。只在事件循环线程访问，无需加锁。
+_QUERY_CACHE = TTLCache(maxsize=1024, ttl=3600)
+
+# 磁盘层缓存：进程重启后内存缓存即失效，而同一 (查询, 日期范围) 的
+# 检索结果在 24 小时内是确定的，落盘后重启/重试可以直接复用
+_DISK_CACHE_DIR = workspace_dir / ".arxiv_cache"
+_DISK_CACHE_TTL_SECONDS = 24 * 3600
+
+def _disk_cache_path(cache_key) -> Path:
+    digest = hashlib.sha256(repr(cache_key).encode()).hexdigest()
+    return _DISK_CACHE_DIR / f"{digest}.pkl"
+
+def _disk_cache_get(cache_key):
+    """读取磁盘缓存，过期（按 mtime）或损坏时返回 None"""
+    path = _disk_cache_path(cache_key)
+    try:
+        if (datetime.now().timestamp() - path.stat().st_mtime) > _DISK_CACHE_TTL_SECONDS:
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+
+def _disk_cache_put(cache_key, candidates):
+    _DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_disk_cache_path(cache_key), "wb") as f:
+        pickle.dump(candidates, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# 特殊短语的预设查询。常量字典和最终查询串在模块导入时构建一次，
+# 不再在每次 build_arxiv_query 调用里重新拼接
+_ABS_OR_TI_LLM = '((abs:LLM OR ti:LLM) OR (abs:"Large Language Model" OR ti:"Large Language Model"))'
+_ABS_OR_TI_RL = '((abs:RL OR ti:RL) OR (abs:"Reinforcement Learning" OR ti:"Reinforcement Learning"))'
+
+_SPECIAL_PHRASE_CONFIG = {
+    "large language model agent rl": [_ABS_OR_TI_LLM, '(abs:agent OR ti:agent)', _ABS_OR_TI_RL],
+    "llm rft": [_ABS_OR_TI_LLM, '(abs:RFT OR ti:RFT)'],
+    "llm reinforcement learning finetuning": [_ABS_OR_TI_LLM, _ABS_OR_TI_RL, '(abs:Finetuning OR ti:Finetuning)'],
+    "large language model rl": [_ABS_OR_TI_LLM, _ABS_OR_TI_RL]
+}
+_SPECIAL_PHRASE_QUERIES = {
+    phrase: f"({' AND '.join(parts)})" for phrase, parts in _SPECIAL_PHRASE_CONFIG.items()
+}
+
+@lru_cache(maxsize=256)
+def _query_for_words(words: tuple) -> str:
+    """按规范化后的单词元组构建并缓存 AND 查询串。
+
+    AND 对顺序不敏感，因此调用方传入排序去重后的元组：分层搜索中
+    只是单词顺序不同的组合会规范化成同一个查询，既命中这里的缓存，
+    也让后续按查询串去重的逻辑识别出更多等价阶段。
+    """
+    query_parts = [f'(abs:{word} OR ti:{word})' for word in words]
+    return f"({' AND '.join(query_parts)})"
+
 def build_arxiv_query(keyword_phrase: str) -> str:
     """
     为给定的关键词短语构建一个高级查询字符串，同时搜索摘要(abs)和标题(ti)。
     - 对于特殊配置的短语，使用预设的 AND/OR 组合。
     - 对于其他短语，将所有单词用 AND 连接，每个单词都同时匹配标题或摘要。
     """
-    _ABS_OR_TI_LLM = '((abs:LLM OR ti:LLM) OR (abs:"Large Language Model" OR ti:"Large Language Model"))'
-    _ABS_OR_TI_RL = '((abs:RL OR ti:RL) OR (abs:"Reinforcement Learning" OR ti:"Reinforcement Learning"))'
-    
-    _SPECIAL_PHRASE_CONFIG = {
-        "large language model agent rl": [_ABS_OR_TI_LLM, '(abs:agent OR ti:agent)', _ABS_OR_TI_RL],
-        "llm rft": [_ABS_OR_TI_LLM, '(abs:RFT OR ti:RFT)'],
-        "llm reinforcement learning finetuning": [_ABS_OR_TI_LLM, _ABS_OR_TI_RL, '(abs:Finetuning OR ti:Finetuning)'],
-        "large language model rl": [_ABS_OR_TI_LLM, _ABS_OR_TI_RL]
-    }
-    
     phrase_lower = keyword_phrase.lower().strip()
-    if phrase_lower in _SPECIAL_PHRASE_CONFIG:
-        query_parts = _SPECIAL_PHRASE_CONFIG[phrase_lower]
-        return f"({' AND '.join(query_parts)})"
+    special_query = _SPECIAL_PHRASE_QUERIES.get(phrase_lower)
+    if special_query is not None:
+        return special_query
     else:
-        words = [word for word in keyword_phrase.split() if word]
+        words = tuple(sorted({word for word in keyword_phrase.split() if word}))
         if not words:
             return ""
-        
-        query_parts = [f'(abs:{word} OR ti:{word})' for word in words]
-        return f"({' AND '.join(query_parts)})"
 
-def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_results, process_log):
+        return _query_for_words(words)
+
+async def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_results, process_log):
     """
     根据日期范围从arXiv检索论文，采用分层降级搜索策略。
     'keywords' 参数是一个按优先级排序的关键词列表。
+
+    各阶段搜索通过 aiohttp 并发发出，由模块级限流器统一保证对 arXiv
+    的请求频率不超过每 3 秒 1 次，网络延迟在各阶段之间相互重叠。
     """
     unique_papers = {}
     try:
@@ -65,38 +155,60 @@ def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_resul
     process_log.append(f"INFO: 开始检索，日期范围: {start_date_str} 到 {end_date_str}")
     logging.info(f"开始检索，日期范围: {start_date_str} 到 {end_date_str}")
 
-    def _perform_search(query_keyword, original_keyword_for_result, stage_name):
+    async def _perform_search(session, query_keyword, original_keyword_for_result, stage_name):
         advanced_query = build_arxiv_query(query_keyword)
         if not advanced_query:
             process_log.append(f"INFO: ({stage_name}) 查询关键词为空，已跳过。")
             return
-            
+
         process_log.append(f"INFO: ({stage_name}) 正在执行搜索 '{query_keyword}' (查询: {advanced_query})")
         logging.info(f"({stage_name}) 正在执行搜索 '{query_keyword}' (查询: {advanced_query})")
-        
+
         try:
-            search = arxiv.Search(
-                query=advanced_query,
-                max_results=max_results * 2,
-                sort_by=arxiv.SortCriterion.SubmittedDate,
-                sort_order=arxiv.SortOrder.Descending
-            )
+            cache_key = (advanced_query, start_date_str, end_date_str, max_results)
+            candidates = _QUERY_CACHE.get(cache_key)
+            if candidates is not None:
+                process_log.append(f"INFO: ({stage_name}) 命中查询缓存，跳过 arXiv 请求。")
+            else:
+                candidates = await asyncio.to_thread(_disk_cache_get, cache_key)
+                if candidates is not None:
+                    _QUERY_CACHE[cache_key] = candidates
+                    process_log.append(f"INFO: ({stage_name}) 命中磁盘查询缓存，跳过 arXiv 请求。")
+            if candidates is None:
+                async with _ARXIV_LIMITER:
+                    async with session.get(ARXIV_API_URL, params={
+                        "search_query": advanced_query,
+                        "max_results": max_results * 2,
+                        "sortBy": "submittedDate",
+                        "sortOrder": "descending"
+                    }) as resp:
+                        resp.raise_for_status()
+                        feed_text = await resp.text()
+                # Atom 解析是纯 CPU 的同步工作，放到线程里做，避免在
+                # 事件循环线程上长时间占着 GIL 阻塞其他请求
+                entries = await asyncio.to_thread(_parse_atom_feed, feed_text)
+
+                candidates = []
+                for entry in entries:
+                    paper_date = datetime.strptime(entry["published"], "%Y-%m-%dT%H:%M:%SZ").date()
+                    if filter_start_date <= paper_date <= filter_end_date:
+                        candidates.append({
+                            "title": re.sub(r'\s+', ' ', entry["title"]).strip(),
+                            "published_date": paper_date.strftime("%Y-%m-%d"),
+                            "summary_en": entry["summary"],
+                            "authors": entry["authors"],
+                            "arxiv_link": entry["id"],
+                            "pdf_link": entry["pdf_link"]
+                        })
+                _QUERY_CACHE[cache_key] = candidates
+                await asyncio.to_thread(_disk_cache_put, cache_key, candidates)
+
             retrieved_count = 0
-            for result in search.results():
+            for paper in candidates:
                 if retrieved_count >= max_results: break
-                paper_date = result.published.date()
-                if filter_start_date <= paper_date <= filter_end_date:
-                    if result.entry_id not in unique_papers:
-                        unique_papers[result.entry_id] = {
-                            "title": result.title,
-                            "published_date": paper_date.strftime("%Y-%m-%d"),
-                            "summary_en": result.summary.replace("\n", " "),
-                            "authors": [author.name for author in result.authors],
-                            "arxiv_link": result.entry_id,
-                            "pdf_link": result.pdf_url,
-                            "original_keyword": original_keyword_for_result
-                        }
-                        retrieved_count += 1
+                if paper["arxiv_link"] not in unique_papers:
+                    unique_papers[paper["arxiv_link"]] = {**paper, "original_keyword": original_keyword_for_result}
+                    retrieved_count += 1
             process_log.append(f"SUCCESS: ({stage_name}) 搜索 '{query_keyword}' 找到 {retrieved_count} 篇新论文。")
         except Exception as e:
             logging.error(f"搜索关键词 '{query_keyword}' 时出错: {e}")
@@ -111,10 +223,12 @@ def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_resul
         process_log.append("WARNING: 未提供任何关键词，任务终止。")
         return []
 
+    # 先收集所有阶段的 (查询, 阶段名)，再统一并发执行
+    staged_searches = []
+
     # --- Stage 1: Primary search with all keywords ---
     full_query = " ".join(keyword_list)
-    _perform_search(full_query, original_query_str_for_log, "主搜索 (全部关键词)")
-    time.sleep(3)
+    staged_searches.append((full_query, "主搜索 (全部关键词)"))
 
     # --- Stage 2 & 3: Supplementary searches if N > 3 ---
     if num_keywords > 3:
@@ -122,28 +236,39 @@ def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_resul
         num_top_80 = math.ceil(num_keywords * 0.8)
         if num_top_80 < num_keywords:
             top_80_keywords = keyword_list[:num_top_80]
-            top_80_query = " ".join(top_80_keywords)
-            _perform_search(top_80_query, original_query_str_for_log, "补充搜索 (前80%)")
-            time.sleep(3)
+            staged_searches.append((" ".join(top_80_keywords), "补充搜索 (前80%)"))
 
         # Stage 3: Searches with top 60% + one from the bottom 40%
         num_top_60 = math.floor(num_keywords * 0.6)
         if num_top_60 < num_keywords and num_top_60 > 0:
             base_keywords = keyword_list[:num_top_60]
             optional_keywords = keyword_list[num_top_60:]
-            
-            stage_name = f"补充搜索 (前60%)"
-            _perform_search(" ".join(base_keywords), original_query_str_for_log, stage_name)
+
+            staged_searches.append((" ".join(base_keywords), "补充搜索 (前60%)"))
             # Shuffle the optional keywords then iterate through them
-            random.shuffle(optional_keywords) 
+            random.shuffle(optional_keywords)
 
             for i, optional_keyword in enumerate(optional_keywords):
                 combined_list = base_keywords + [optional_keyword]
-                supplementary_query = " ".join(combined_list)
-                stage_name = f"补充搜索 (前60% + 可选词 {i+1})"
-                _perform_search(supplementary_query, original_query_str_for_log, stage_name)
-                time.sleep(3)
+                staged_searches.append((" ".join(combined_list), f"补充搜索 (前60% + 可选词 {i+1})"))
+
+    # 不同阶段的关键词组合可能生成完全相同的高级查询（例如前 60% 与
+    # 前 80% 截出同一组词），按最终查询串去重，避免重复请求 arXiv
+    seen_queries = set()
+    deduped_searches = []
+    for query, stage_name in staged_searches:
+        advanced_query = build_arxiv_query(query)
+        if advanced_query in seen_queries:
+            process_log.append(f"INFO: ({stage_name}) 查询与先前阶段重复，已跳过。")
+            continue
+        seen_queries.add(advanced_query)
+        deduped_searches.append((query, stage_name))
 
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*[
+            _perform_search(session, query, original_query_str_for_log, stage_name)
+            for query, stage_name in deduped_searches
+        ])
 
     total_found = len(unique_papers)
     process_log.append(f"SUCCESS: 所有分层检索完成，共找到 {total_found} 篇不重复的论文。")
@@ -151,31 +276,88 @@ def search_arxiv_by_date_range(keywords, start_date_str, end_date_str, max_resul
     return list(unique_papers.values())
 
 
-async def translate_one_abstract(aclient, abstract_en, target_language, semaphore):
-    """使用 LLM 异步翻译单个摘要。"""
+@retry(
+    stop=stop_after_attempt(MAX_RETRIES),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, APITimeoutError)),
+    reraise=True
+)
+async def _chat_completion(**kwargs):
+    """带指数退避+抖动重试的 chat.completions 调用。
+
+    只对限流/连接类瞬时错误重试，平滑掉限流风暴；其余错误直接抛出，
+    由上层按批次标记失败，不再把错误字符串写进翻译结果。
+    """
+    return await aclient.chat.completions.create(**kwargs)
+
+
+async def translate_one_abstract(aclient, abstract_en, target_language):
+    """使用 LLM 异步翻译单个摘要。翻译失败时抛出异常，由调用方处理。"""
     if not abstract_en or not abstract_en.strip(): return ""
-    async with semaphore:
+    async with OPENAI_SEMAPHORE:
+        prompt_content = f"Please translate the following academic abstract into {target_language}. Keep the original formatting and technical terms. Abstract: "
+        response = await _chat_completion(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": prompt_content},
+                {"role": "user", "content": abstract_en}
+            ],
+            temperature=0.2,
+            max_tokens=4000
+        )
+        return response.choices[0].message.content.strip()
+
+async def translate_batch(aclient, abstracts, target_language):
+    """使用 LLM 在单次调用中批量翻译多个摘要。
+
+    把多个摘要用 <<i>> 编号分隔符拼接进同一个请求，要求模型在输出中保留
+    相同的分隔符，再按编号拆分结果。相比逐条翻译，可以摊薄每次请求的
+    连接建立和 prompt prefill 开销。若返回的编号与输入对不上，则降级为
+    逐条翻译。
+    """
+    if not abstracts:
+        return []
+    if len(abstracts) == 1:
+        return [await translate_one_abstract(aclient, abstracts[0], target_language)]
+    async with OPENAI_SEMAPHORE:
         try:
-            prompt_content = f"Please translate the following academic abstract into {target_language}. Keep the original formatting and technical terms. Abstract: "
-            response = await aclient.chat.completions.create(
+            joined = "\n".join(f"<<{i+1}>>\n{a}" for i, a in enumerate(abstracts))
+            prompt_content = (
+                f"Please translate each of the following academic abstracts into {target_language}. "
+                "The abstracts are separated by numbered markers like <<1>>, <<2>>. "
+                "Reply with the translations separated by the SAME numbered markers, one marker per abstract, "
+                "and keep the original formatting and technical terms. Do not add any other text."
+            )
+            response = await _chat_completion(
                 model=MODEL_NAME,
                 messages=[
                     {"role": "system", "content": prompt_content},
-                    {"role": "user", "content": abstract_en}
+                    {"role": "user", "content": joined}
                 ],
                 temperature=0.2,
-                max_tokens=4000
+                max_tokens=8000
             )
-            return response.choices[0].message.content.strip()
+            content = response.choices[0].message.content
+            # split 结果形如 ['', '1', 译文1, '2', 译文2, ...]
+            parts = _BATCH_DELIM_RE.split(content)
+            translated = {int(idx): text.strip() for idx, text in zip(parts[1::2], parts[2::2])}
+            if len(translated) >= len(abstracts):
+                return [translated.get(i + 1, "") for i in range(len(abstracts))]
+            logging.warning(f"批量翻译返回 {len(translated)} 条结果，预期 {len(abstracts)} 条，降级为逐条翻译。")
         except Exception as e:
-            logging.error(f"翻译摘要时出错: {e}")
-            return f"翻译错误: {e}"
+            logging.error(f"批量翻译摘要时出错: {e}，降级为逐条翻译。")
+    # 降级方案：逐条翻译该批次
+    return list(await asyncio.gather(*[
+        translate_one_abstract(aclient, a, target_language) for a in abstracts
+    ]))
+
+# 文件名清理用的预编译模式
+_FILENAME_WS_RE = re.compile(r'[\s,]+')
+_FILENAME_NONWORD_RE = re.compile(r'[^\w\-_.]')
 
 def sanitize_filename_part(text: str) -> str:
     """清理字符串，使其可安全地用于文件名。"""
-    text = re.sub(r'[\s,]+', '_', text)
-    text = re.sub(r'[^\w\-_.]', '', text)
-    return text[:50]
+    return _FILENAME_NONWORD_RE.sub('', _FILENAME_WS_RE.sub('_', text))[:50]
 
 async def run_arxiv_search_and_process(run_id: str, request_params: dict):
     """后台任务的主执行函数：搜索、翻译、保存。"""
@@ -184,41 +366,21 @@ async def run_arxiv_search_and_process(run_id: str, request_params: dict):
     work_dir.mkdir(exist_ok=True)
     
     try:
-        papers = search_arxiv_by_date_range(
+        papers = await search_arxiv_by_date_range(
             keywords=request_params['keywords'],
             start_date_str=request_params['start_date'],
             end_date_str=request_params['end_date'],
             max_results=request_params['max_results'],
             process_log=process_log
         )
-        background_tasks[run_id]['summary'] = process_log
 
         if not papers:
             process_log.append("INFO: 未找到符合条件的论文，任务结束。")
-            background_tasks[run_id].update({"status": "completed", "summary": process_log})
+            background_tasks[run_id].update({"status": "completed"})
             return
 
         target_language = request_params.get('target_language')
-        if target_language and target_language.strip():
-            process_log.append(f"INFO: 开始将 {len(papers)} 篇论文摘要翻译为 {target_language}...")
-            background_tasks[run_id].update({"status": "translating", "summary": process_log})
-            
-            aclient = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_API_BASE)
-            semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
-            
-            translation_tasks = [
-                translate_one_abstract(aclient, paper['summary_en'], target_language, semaphore)
-                for paper in papers
-            ]
-            translated_summaries = await asyncio.gather(*translation_tasks, return_exceptions=True)
-            
-            for paper, translated in zip(papers, translated_summaries):
-                paper['summary_translated'] = translated if not isinstance(translated, Exception) else f"翻译失败: {translated}"
-            process_log.append("SUCCESS: 所有摘要翻译完成。")
-        else:
-            process_log.append("INFO: 无需翻译。")
-            for paper in papers:
-                paper['summary_translated'] = ""
+        do_translate = bool(target_language and target_language.strip())
 
         topic_str = sanitize_filename_part("_".join(request_params['keywords']))
         lang_str = sanitize_filename_part(target_language) if target_language else "en"
@@ -227,36 +389,77 @@ async def run_arxiv_search_and_process(run_id: str, request_params: dict):
         count = len(papers)
         csv_filename = f"arxiv_papers_{topic_str}_{start_str}_to_{end_str}_{lang_str}_{count}.csv"
         output_path = outputs_dir / csv_filename
-        
-        process_log.append(f"INFO: 准备将结果写入文件: {csv_filename}")
-        
+
+        process_log.append(f"INFO: 结果将流式写入文件: {csv_filename}")
+
         fieldnames = ["原始关键词", "论文标题", "发表日期", "英文摘要", f"翻译摘要 ({lang_str})", "作者列表", "arxiv链接", "PDF链接"]
-        with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for paper in papers:
-                writer.writerow({
-                    "原始关键词": paper.get("original_keyword", "N/A"),
-                    "论文标题": paper['title'],
-                    "发表日期": paper['published_date'],
-                    "英文摘要": paper['summary_en'],
-                    f"翻译摘要 ({lang_str})": paper['summary_translated'],
-                    "作者列表": ", ".join(paper['authors']),
-                    "arxiv链接": paper['arxiv_link'],
-                    "PDF链接": paper.get('pdf_link', 'N/A')
-                })
-        
+        # 以二进制 + 1MB 缓冲打开，BOM 只手动写一次；TextIOWrapper 负责
+        # utf-8 编码，编码结果按大块落盘，而不是文本模式下的逐行小写入
+        with open(output_path, 'wb', buffering=1 << 20) as raw, \
+                io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            raw.write(b'\xef\xbb\xbf')
+            # csv.writer + 位置行比 DictWriter 省去每行每个字段的字典查找
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+
+            def _write_rows(finished_papers):
+                writer.writerows(
+                    [
+                        paper.get("original_keyword", "N/A"),
+                        paper['title'],
+                        paper['published_date'],
+                        paper['summary_en'].replace("\n", " "),
+                        paper['summary_translated'],
+                        ", ".join(paper['authors']),
+                        paper['arxiv_link'],
+                        paper.get('pdf_link', 'N/A')
+                    ]
+                    for paper in finished_papers
+                )
+
+            if do_translate:
+                process_log.append(f"INFO: 开始将 {len(papers)} 篇论文摘要翻译为 {target_language}...")
+                background_tasks[run_id].update({"status": "translating"})
+
+                # 按 TRANSLATION_BATCH_SIZE 分批，每批一次 LLM 调用；
+                # 哪一批先翻译完就先写入 CSV，让磁盘写入与 LLM 延迟重叠
+                batches = [papers[i:i + TRANSLATION_BATCH_SIZE] for i in range(0, len(papers), TRANSLATION_BATCH_SIZE)]
+
+                async def _translate_and_fill(batch):
+                    try:
+                        translated = await translate_batch(
+                            aclient, [p['summary_en'] for p in batch], target_language
+                        )
+                    except Exception as e:
+                        for paper in batch:
+                            paper['summary_translated'] = f"翻译失败: {e}"
+                    else:
+                        for paper, text in zip(batch, translated):
+                            paper['summary_translated'] = text
+                    return batch
+
+                for coro in asyncio.as_completed([_translate_and_fill(batch) for batch in batches]):
+                    finished_batch = await coro
+                    _write_rows(finished_batch)
+                    f.flush()
+                process_log.append("SUCCESS: 所有摘要翻译完成并写入。")
+            else:
+                process_log.append("INFO: 无需翻译。")
+                for paper in papers:
+                    paper['summary_translated'] = ""
+                _write_rows(papers)
+
+
         process_log.append("🎉 SUCCESS: 任务成功完成！")
         background_tasks[run_id].update({
             "status": "completed",
-            "summary": process_log,
             "output_path": str(output_path)
         })
 
     except Exception as e:
         logging.error(f"Run ID {run_id}: 处理过程中发生致命错误: {e}", exc_info=True)
         process_log.append(f"❌ FATAL_ERROR: {e}")
-        background_tasks[run_id].update({"status": "failed", "summary": process_log})
+        background_tasks[run_id].update({"status": "failed"})
     finally:
         if work_dir.exists():
             shutil.rmtree(work_dir)
@@ -1,9 +1,12 @@
+import hashlib
 import os
+import posixpath
 import shutil
 import zipfile
 import tarfile
 import re
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from openai import OpenAI
@@ -17,22 +20,74 @@ from core.utils import retry_step
 # --- 初始化模块 ---
 client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_API_BASE)
 
+# --- 预编译的正则 ---
+# LLM 回复的代码块围栏
+_FENCE_OPEN_RE = re.compile(r'^```(latex)?\n', re.MULTILINE)
+_FENCE_CLOSE_RE = re.compile(r'\n```$', re.MULTILINE)
+# LaTeX 结构标记，合并为一个交替式正则：对整个 tex 文本做一次线性
+# 扫描即可同时定位 \section / \input / \end{document} 并收集 bib 行，
+# 替代此前的多次全文 search 加一次 splitlines 遍历
+_LATEX_MARKER_RE = re.compile(
+    r'(?P<section>\\section)'
+    r'|(?P<input>\\input)'
+    r'|(?P<enddoc>\\end\{document\})'
+    r'|(?P<bib>^[ \t]*\\bibliography(?:style)?\b.*)',
+    re.MULTILINE
+)
+
+def _scan_latex_markers(text: str):
+    """一次扫描 LaTeX 文本，返回 (section_pos, input_pos, enddoc_pos, bib_lines)。
+
+    位置为对应标记首次出现的偏移量，未出现时为 None；bib_lines 是所有
+    \\bibliography / \\bibliographystyle 行的原文列表。
+    """
+    section_pos = input_pos = enddoc_pos = None
+    bib_lines = []
+    for m in _LATEX_MARKER_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == 'section':
+            if section_pos is None: section_pos = m.start()
+        elif kind == 'input':
+            if input_pos is None: input_pos = m.start()
+        elif kind == 'enddoc':
+            if enddoc_pos is None: enddoc_pos = m.start()
+        else:
+            bib_lines.append(m.group())
+    return section_pos, input_pos, enddoc_pos, bib_lines
+
+# LLM 响应的本地缓存目录：call_llm 使用 temperature=0.0，对同一提示词的
+# 响应是确定性的，可以安全地按 (模型, 提示词) 哈希做精确匹配缓存。
+# 重试、以及对相同压缩包的重复转换不再消耗 LLM 调用。
+_LLM_CACHE_DIR = workspace_dir / ".llm_cache"
+
+# 本身已是压缩格式的文件后缀，打包时直接存储，不做二次压缩
+_PRECOMPRESSED_SUFFIXES = {'.pdf', '.png', '.jpg', '.jpeg', '.gif', '.zip', '.gz'}
+
 
 @retry_step
-def call_llm(prompt: str) -> str:
+def call_llm(prompt: str, max_tokens: int = 4096) -> str:
     """
     调用大语言模型 (LLM) 并处理重试逻辑。
 
+    响应按 (模型, 提示词) 的 sha256 缓存在磁盘上，命中时不发起请求。
+
     Args:
         prompt (str): 发送给 LLM 的提示词。
-        max_retries (int): 最大重试次数。
+        max_tokens (int): 输出 token 上限。解码耗时和费用都正比于输出
+            长度，按调用点预期的输出规模收紧上限可以防止模型跑飞。
 
     Returns:
         str: LLM 返回的响应内容。
-    
+
     Raises:
         Exception: 在多次重试后仍然失败时抛出异常。
     """
+    cache_key = hashlib.sha256(f"{MODEL_NAME}|{max_tokens}|{prompt}".encode()).hexdigest()
+    cache_path = _LLM_CACHE_DIR / f"{cache_key}.txt"
+    if cache_path.exists():
+        logging.info("LLM 响应命中本地缓存，跳过请求。")
+        return cache_path.read_text(encoding='utf-8')
+
     logging.info("正在与 LLM 交互...")
     response = client.chat.completions.create(
         model=MODEL_NAME,
@@ -41,23 +96,45 @@ def call_llm(prompt: str) -> str:
             {"role": "user", "content": prompt}
         ],
         temperature=0.0,
+        max_tokens=max_tokens,
     )
-    logging.info(f"Asking: {prompt[:400]}...") # 避免日志过长
+    # 提示词/响应全文只在 DEBUG 级别记录，INFO 下不做这部分字符串拼接
+    logger = logging.getLogger()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Asking: %.400s...", prompt) # 避免日志过长
     if response and response.choices and response.choices[0].message and response.choices[0].message.content:
         content = response.choices[0].message.content
-        content = re.sub(r'^```(latex)?\n', '', content, flags=re.MULTILINE)
-        content = re.sub(r'\n```$', '', content, flags=re.MULTILINE)
+        content = _FENCE_OPEN_RE.sub('', content)
+        content = _FENCE_CLOSE_RE.sub('', content)
         response = content.strip()
-        logging.info(f"Response: {response}") 
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response: %s", response)
+        _LLM_CACHE_DIR.mkdir(exist_ok=True)
+        cache_path.write_text(response, encoding='utf-8')
         return response
     raise ValueError("LLM 返回了无效或空的响应。")
 
+def _common_top_dir(names: list) -> str:
+    """若压缩包内所有成员都位于同一个顶层目录下，返回该目录名，否则返回空串。"""
+    top_dirs = set()
+    for name in names:
+        clean = posixpath.normpath(name)
+        if clean in ('.', '/', ''):
+            continue
+        top_dirs.add(clean.split('/', 1)[0])
+    if len(top_dirs) != 1:
+        return ''
+    top = top_dirs.pop()
+    # 只有在确实存在子路径时它才是一个冗余目录（排除包里只有单个文件的情况）
+    has_children = any(posixpath.normpath(name).startswith(top + '/') for name in names)
+    return top if has_children else ''
+
 def extract_archive(archive_path: str, extract_to: str):
     """
-    解压 .zip 或 .tar.gz 文件，并处理解压后可能出现的单层冗余目录。
+    解压 .zip 或 .tar.gz 文件，并处理可能出现的单层冗余目录。
 
-    如果解压后 `extract_to` 目录中只包含一个子目录，
-    则会将该子目录中的所有内容移动到 `extract_to`，并删除该空子目录。
+    如果压缩包内所有成员都在同一个顶层目录下（常见于打包时多套了一层），
+    则在解压时直接剥离该前缀，避免解压后再做一次目录遍历和逐个 move。
 
     Args:
         archive_path (str): 压缩文件路径。
@@ -65,7 +142,7 @@ def extract_archive(archive_path: str, extract_to: str):
 
     Returns:
         str: 压缩文件的后缀名 ('.zip' 或 '.tar.gz')。
-    
+
     Raises:
         ValueError: 如果文件格式不受支持。
     """
@@ -74,25 +151,54 @@ def extract_archive(archive_path: str, extract_to: str):
     logging.info(f"正在解压文件: {archive_path} 到 {extract_to}")
     os.makedirs(extract_to, exist_ok=True)
 
+    def _is_junk(name: str) -> bool:
+        """macOS 打包产生的垃圾成员 (__MACOSX 目录、AppleDouble ._ 文件)，
+        直接不解压，省掉磁盘写入和后续遍历时的过滤。"""
+        parts = posixpath.normpath(name).split('/')
+        return '__MACOSX' in parts or parts[-1].startswith('._')
+
+    def _stripped_name(name: str, prefix: str):
+        """返回剥离顶层目录前缀后的成员名；剥离后为空或属于垃圾成员则返回 None (跳过)。"""
+        clean = posixpath.normpath(name)
+        if clean in ('.', '/', ''):
+            return None
+        if _is_junk(clean):
+            return None
+        if prefix:
+            if clean == prefix:
+                return None
+            clean = clean[len(prefix) + 1:]
+        return clean or None
+
     if suffix == '.zip':
         with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
+            members = zip_ref.infolist()
+            prefix = _common_top_dir([m.filename for m in members if not _is_junk(m.filename)])
+            if prefix:
+                logging.info(f"检测到单一顶层目录 '{prefix}'，解压时直接剥离该前缀。")
+            for member in members:
+                stripped = _stripped_name(member.filename, prefix)
+                if stripped is None:
+                    continue
+                member.filename = stripped + ('/' if member.is_dir() else '')
+                zip_ref.extract(member, extract_to)
     elif suffix in ['.tar.gz', '.tgz']:
         with tarfile.open(archive_path, 'r:gz') as tar_ref:
-            tar_ref.extractall(path=extract_to)
+            members = tar_ref.getmembers()
+            prefix = _common_top_dir([m.name for m in members if not _is_junk(m.name)])
+            if prefix:
+                logging.info(f"检测到单一顶层目录 '{prefix}'，解压时直接剥离该前缀。")
+            kept_members = []
+            for member in members:
+                stripped = _stripped_name(member.name, prefix)
+                if stripped is None:
+                    continue
+                member.name = stripped
+                kept_members.append(member)
+            # filter='data' 顺带剥掉危险路径/设备文件等 (PEP 706)
+            tar_ref.extractall(path=extract_to, members=kept_members, filter='data')
     else:
         raise ValueError(f"不支持的压缩文件格式: {suffix}。")
-
-    logging.info(f"检查解压目录 '{extract_to}' 是否存在单一冗余子目录。")
-    items = os.listdir(extract_to)
-    if len(items) == 1:
-        single_item_path = os.path.join(extract_to, items[0])
-        if os.path.isdir(single_item_path):
-            logging.info(f"发现单一子目录: '{single_item_path}'，准备提升其内容。")
-            for item_in_subdir in os.listdir(single_item_path):
-                shutil.move(os.path.join(single_item_path, item_in_subdir), os.path.join(extract_to, item_in_subdir))
-            os.rmdir(single_item_path)
-            logging.info(f"内容提升完成，已删除空目录: '{single_item_path}'")
     return suffix
 
 @retry_step
@@ -113,7 +219,20 @@ def find_main_tex_file(directory: str, process_log: list) -> str:
     Raises:
         FileNotFoundError: 如果找不到 .tex 文件或 LLM 无法确定主文件。
     """
-    tex_files = [p for p in Path(directory).rglob('*.tex') if '__MACOSX' not in p.parts]
+    # 一次遍历同时收集 .tex 文件和目录树文本（此前 rglob + os.walk 走了两遍）
+    tex_files = []
+    file_tree = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != '__MACOSX']
+        level = root.replace(directory, '').count(os.sep)
+        indent = ' ' * 4 * level
+        file_tree.append(f"{indent}{os.path.basename(root)}/")
+        sub_indent = ' ' * 4 * (level + 1)
+        for f in files:
+            file_tree.append(f"{sub_indent}{f}")
+            if f.endswith('.tex'):
+                tex_files.append(Path(root) / f)
+
     if not tex_files:
         raise FileNotFoundError(f"在目录 '{directory}' 中没有找到任何 .tex 文件。")
 
@@ -125,16 +244,14 @@ def find_main_tex_file(directory: str, process_log: list) -> str:
     process_log.append("WARNING: 发现多个 .tex 文件，将使用 LLM 确定主文件。")
     logging.info("发现多个 .tex 文件，将使用 LLM 确定主文件。")
 
-    file_tree = []
-    for root, _, files in os.walk(directory):
-        if '__MACOSX' in root: continue
-        level = root.replace(directory, '').count(os.sep)
-        indent = ' ' * 4 * level
-        file_tree.append(f"{indent}{os.path.basename(root)}/")
-        sub_indent = ' ' * 4 * (level + 1)
-        for f in files: file_tree.append(f"{sub_indent}{f}")
     file_tree_str = "\n".join(file_tree)
-    tex_content_snippets = [f"--- 文件: {os.path.relpath(p, directory)} ---\n{p.read_text(encoding='utf-8', errors='ignore')[:300]}\n" for p in tex_files]
+
+    def _read_snippet(p: Path) -> str:
+        """只读取文件开头 300 字节，避免为取预览而整读大文件。"""
+        with open(p, 'rb') as fh:
+            return fh.read(300).decode('utf-8', 'ignore')
+
+    tex_content_snippets = [f"--- 文件: {os.path.relpath(p, directory)} ---\n{_read_snippet(p)}\n" for p in tex_files]
     prompt = f"""
 你是一个LaTeX专家。请根据下面提供的文件结构和 .tex 文件内容片段，判断哪个是主 .tex 文件。
 主文件通常是包含 `\\documentclass` 命令并且是整个文档编译入口的文件。
@@ -152,13 +269,34 @@ def find_main_tex_file(directory: str, process_log: list) -> str:
 
 请分析以上信息，并仅返回你认为是主文件的那个文件的相对路径 (例如: xx.tex 或 src/xx.tex)。不要添加任何解释。
 """
-    main_file_relative_path = call_llm(prompt)
+    # 只需要返回一个相对路径
+    main_file_relative_path = call_llm(prompt, max_tokens=64)
     main_file_path = Path(directory) / main_file_relative_path.strip()
     if not main_file_path.exists():
         raise FileNotFoundError(f"LLM 返回了不存在的文件路径: {main_file_relative_path}")
     logging.info(f"LLM 确定主文件为: {main_file_path}")
     return str(main_file_path)
 
+def _merge_tree_with_links(src_dir, dst_dir):
+    """把 src_dir 下的所有文件合并进 dst_dir，同名文件以 src 为准。
+
+    同一文件系统内用 os.link 建硬链接，零字节拷贝；链接失败（跨文件
+    系统、文件系统不支持等）时回退到 shutil.copy2。
+    """
+    src_dir = Path(src_dir)
+    dst_dir = Path(dst_dir)
+    for root, _, files in os.walk(src_dir):
+        target_root = dst_dir / Path(root).relative_to(src_dir)
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            src = Path(root) / name
+            dst = target_root / name
+            dst.unlink(missing_ok=True)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
 def convert_paper_format_logic(run_id: str, content_archive_path: str, format_archive_path: str):
     """
     实现论文格式转换的主要流程。
@@ -167,8 +305,8 @@ def convert_paper_format_logic(run_id: str, content_archive_path: str, format_ar
         content_archive_path (str): 原始论文压缩包路径。
         format_archive_path (str): 新格式压缩包路径。
     """
-    process_log = ["INFO: 开始格式转换流程。"]
-    conversion_tasks[run_id]['summary'] = process_log
+    process_log = conversion_tasks[run_id]['summary']
+    process_log.append("INFO: 开始格式转换流程。")
     
     work_dir = workspace_dir / f"work_dir_{run_id}"
     if work_dir.exists(): shutil.rmtree(work_dir)
@@ -179,48 +317,59 @@ def convert_paper_format_logic(run_id: str, content_archive_path: str, format_ar
     
     try:
         # 步骤 1 & 2 & 3
-        extract_archive(content_archive_path, str(content_dir))
-        process_log.append("SUCCESS: 原始论文压缩包已解压。")
-        extract_archive(format_archive_path, str(format_dir))
-        process_log.append("SUCCESS: 新格式压缩包已解压。")
-        conversion_tasks[run_id]['summary'] = process_log
-
-        content_main_path = Path(find_main_tex_file(str(content_dir), process_log))
-        process_log.append(f"SUCCESS: 找到原始论文主文件: '{content_main_path.name}'")
-        format_main_path = Path(find_main_tex_file(str(format_dir), process_log))
-        process_log.append(f"SUCCESS: 找到格式模板主文件: '{format_main_path.name}'")
+        # 两个压缩包（以及之后的两次主文件查找）互相独立，用线程池并行执行；
+        # 解压是磁盘 I/O、主文件查找可能触发 HTTPS LLM 调用，都不受 GIL 限制
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            content_future = executor.submit(extract_archive, content_archive_path, str(content_dir))
+            format_future = executor.submit(extract_archive, format_archive_path, str(format_dir))
+            content_future.result()
+            process_log.append("SUCCESS: 原始论文压缩包已解压。")
+            format_future.result()
+            process_log.append("SUCCESS: 新格式压缩包已解压。")
+            conversion_tasks[run_id]['summary'] = process_log
+
+            content_future = executor.submit(find_main_tex_file, str(content_dir), process_log)
+            format_future = executor.submit(find_main_tex_file, str(format_dir), process_log)
+            content_main_path = Path(content_future.result())
+            process_log.append(f"SUCCESS: 找到原始论文主文件: '{content_main_path.name}'")
+            format_main_path = Path(format_future.result())
+            process_log.append(f"SUCCESS: 找到格式模板主文件: '{format_main_path.name}'")
         
         backup_path = format_main_path.with_suffix(".bak.tex")
         shutil.copy2(format_main_path, backup_path)
         process_log.append(f"INFO: 格式模板主文件已备份到 '{backup_path.name}'")
         conversion_tasks[run_id]['summary'] = process_log
 
-        # 步骤 4: 合并文件目录
-        shutil.copytree(str(content_dir), str(format_dir), dirs_exist_ok=True)
-        process_log.append("INFO: 原始论文文件已全部复制到新格式目录。")
+        # 步骤 4: 合并文件目录。两个目录都在同一个 workspace 下，优先用
+        # 硬链接代替逐字节复制（图片多的论文包可省下几十 MB 的 I/O），
+        # 跨文件系统等链接失败的情况回退到普通复制
+        _merge_tree_with_links(content_dir, format_dir)
+        process_log.append("INFO: 原始论文文件已全部合并到新格式目录。")
         content_main_path_in_format_dir = format_dir / content_main_path.name
         
         # 步骤 5: LLM 核心合并逻辑
         content_text = content_main_path_in_format_dir.read_text(encoding='utf-8', errors='ignore')
         format_text = format_main_path.read_text(encoding='utf-8', errors='ignore')
 
+        # 对两份文本各做一次扫描，拿到全部结构标记
+        (content_section_pos, content_input_pos,
+         content_enddoc_pos, content_bib_lines) = _scan_latex_markers(content_text)
+        (format_section_pos, _, _, format_bib_lines) = _scan_latex_markers(format_text)
+
         # [修改点 3]: 先找 \section，再找 \input
-        content_section_match = re.search(r'\\section', content_text)
-        if not content_section_match:
+        content_split_index = content_section_pos
+        if content_split_index is None:
             logging.info("未找到 `\\section`，正在尝试查找 `\\input` 作为正文起点...")
-            content_section_match = re.search(r'\\input', content_text)
+            content_split_index = content_input_pos
 
-        if not content_section_match:
+        if content_split_index is None:
             raise ValueError("在原始论文主文件中未找到 `\\section` 或 `\\input` 作为正文起点。")
-        
-        content_split_index = content_section_match.start()
+
         content_header = content_text[:content_split_index]
-        content_end_doc_match = re.search(r'\\end{document}', content_text)
-        content_end_index = content_end_doc_match.start() if content_end_doc_match else len(content_text)
+        content_end_index = content_enddoc_pos if content_enddoc_pos is not None else len(content_text)
         content_body = content_text[content_split_index:content_end_index]
 
-        format_section_match = re.search(r'\\section', format_text)
-        format_split_index = format_section_match.start() if format_section_match else len(format_text)
+        format_split_index = format_section_pos if format_section_pos is not None else len(format_text)
         format_header = format_text[:format_split_index]
 
         header_prompt = f"""
@@ -254,17 +403,7 @@ def convert_paper_format_logic(run_id: str, content_archive_path: str, format_ar
         merged_header = call_llm(header_prompt)
         process_log.append("SUCCESS: LLM 已成功合并文件头部信息。")
 
-        # [修改点 4]: 宽松地匹配 bib 相关行
-        content_bib_lines = []
-        for line in content_text.splitlines():
-            if line.strip().startswith(r'\bibliography') or line.strip().startswith(r'\bibliographystyle'):
-                content_bib_lines.append(line)
-
-        format_bib_lines = []
-        for line in format_text.splitlines():
-            if line.strip().startswith(r'\bibliography') or line.strip().startswith(r'\bibliographystyle'):
-                format_bib_lines.append(line)
-
+        # [修改点 4]: bib 相关行已在上面的单次扫描中收集
         final_bib_section = ""
         if format_bib_lines:
             original_format_bib = "\n".join(format_bib_lines)
@@ -277,7 +416,8 @@ def convert_paper_format_logic(run_id: str, content_archive_path: str, format_ar
             
             format_bib_str = "\n".join(format_bib_lines)
             bib_prompt = f"你是一个LaTeX文献管理专家。请根据下面的原始文献命令和新格式模板的文献命令，生成合并后的新命令。\n\n[任务要求]\n1. 使用新格式的样式和原始内容的 .bib 文件名，生成新的 `\\bibliographystyle` 和 `\\bibliography` 命令。\n2. 如果新格式命令为空，使用通用样式 `unsrt`。\n3. 只输出新命令，不要解释。\n\n[原始文献命令]:\n{content_bib_lines}\n\n[新格式文献命令]:\n{format_bib_lines}"
-            merged_bib_lines = call_llm(bib_prompt)
+            # 输出只是两三行 bib 命令
+            merged_bib_lines = call_llm(bib_prompt, max_tokens=256)
             final_bib_section += merged_bib_lines
             process_log.append("SUCCESS: Bibliography 信息已成功合并。")
         else:
@@ -285,15 +425,25 @@ def convert_paper_format_logic(run_id: str, content_archive_path: str, format_ar
         
         # 组装和写入
         final_tex_content = f"{merged_header.strip()}\n\n{content_body.strip()}\n\n{final_bib_section.strip()}\n\n\\end{{document}}\n"
+        # 先断开可能存在的硬链接再写入，避免就地截断与 content 目录共享的 inode
+        format_main_path.unlink(missing_ok=True)
         format_main_path.write_text(final_tex_content, encoding='utf-8')
         process_log.append(f"SUCCESS: 新的主文件 '{format_main_path.name}' 已生成。")
         
-        # 步骤 6: 打包输出
-        output_zip_base_name = f"{run_id}_converted_paper"
-        output_zip_path = outputs_dir / output_zip_base_name
-        shutil.make_archive(str(output_zip_path), 'zip', str(format_dir))
-        
-        final_path = f"{output_zip_path}.zip"
+        # 步骤 6: 打包输出。图片/PDF 等本身已是压缩格式，直接存储不再
+        # 二次 deflate；其余文件用最低压缩级别，打包速度远快于
+        # shutil.make_archive 的默认压缩，体积差别可以忽略
+        final_path = str(outputs_dir / f"{run_id}_converted_paper.zip")
+        with zipfile.ZipFile(final_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for root, _, files in os.walk(format_dir):
+                for name in files:
+                    file_path = Path(root) / name
+                    compress_type = (
+                        zipfile.ZIP_STORED
+                        if file_path.suffix.lower() in _PRECOMPRESSED_SUFFIXES
+                        else zipfile.ZIP_DEFLATED
+                    )
+                    zf.write(file_path, file_path.relative_to(format_dir), compress_type=compress_type)
         process_log.append("🎉 SUCCESS: 格式转换成功！")
         conversion_tasks[run_id].update({
             "status": "completed",
@@ -1,165 +1,315 @@
+import asyncio
+import hashlib
 import logging
-import json
 from typing import Dict, List, Optional
 
-from openai import OpenAI
+import orjson
+from cachetools import TTLCache
 
 from config import (
-    OPENAI_API_KEY, OPENAI_API_BASE, MODEL_NAME, style_transfer_tasks
+    aclient, MODEL_NAME, OPENAI_SEMAPHORE, SUGGESTIONS_MODEL_NAME, style_transfer_tasks
 )
-from core.utils import retry_step
-
-# --- 初始化 OpenAI 客户端 ---
-client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_API_BASE)
-
-def build_prompt(original_text: str, must_include_keywords: Optional[List[str]], reference_keywords: Optional[List[str]], style_requirements: Optional[List[str]], style_example: Optional[str], previous_results: Optional[List[str]] = None, mode = None) -> str:
-    """构建用于文本润色的详细提示词 (版本 2.0)"""
-    
-    prompt = "你是一位顶级的学术写作专家和语言模型。你的任务是基于一系列极其严格和精确的指令，对一段初始文本进行深度、专业的重构和优化。\n\n"
-    
-    prompt += "【核心改写准则：必须严格遵守】\n"
-    prompt += "1.  **关键词强制注入 (Keyword Injection Mandate)**: 在任何情况下，**[必须包含的关键词]** 列表中的每一个词，都必须 **一字不差 (verbatim)** 地出现在你最终生成的文本中。在生成后，你必须进行自我核查，确保没有任何遗漏。这是一个绝对的、不可协商的指令。\n"
-    prompt += "2.  **风格深度复刻 (Style Replication Imperative)**: 你的首要目标是成为**[风格参考示例]**作者的“影子写手”。在动笔前，你必须进行深度的风格解构分析。你的最终输出在**阐述视角、句式复杂度、词汇选择和行文节奏**上，必须达到与参考范例难以区分的程度。单纯的模仿是不够的，你需要实现风格的完全复现。\n\n"
-
-    prompt += "【改写执行流程】\n"
-    prompt += "1.  **第一步：解构分析**\n"
-    prompt += "    - **内容分析**: 彻底理解 **[待改写的表述]** 的所有核心信息点和逻辑关系，确保无遗漏、无曲解。\n"
-    prompt += "    - **风格分析**: 系统性解构 **[风格参考示例]** 的句式结构（例如，主从复合句的比例、平均句长）、专业词组搭配 (collocations) 和整体的阐述视角（客观、主观、批判性等）。\n"
-    prompt += "2.  **第二步：融合重构**\n"
-    prompt += "    - 依据分析所得，用**复刻的风格**重新组织和表达**待改写的内容**。\n"
-    prompt += "    - 在重构过程中，将**[必须包含的关键词]** 自然、无缝地植入文本，使其看起来像是原文固有的一部分。\n"
-    prompt += "    - 同时，确保**[需表达含义的关键词]** 的核心语义被准确传达。\n"
-    prompt += "3.  **第三步：最终校验**\n"
-    prompt += "    - **检查关键词**: 回溯检查，确认所有**[必须包含的关键词]**都已一字不差地包含在内。\n"
-    prompt += "    - **比对风格**: 将你的草稿与**[风格参考示例]**并排比对，评估风格的一致性。如果不达标，返回第二步进行修改。\n\n"
-    
-    prompt += "---【输入材料清单】---\n"
-    prompt += f"1. **[待改写的表述]**:\n   - {original_text}\n\n"
-    
+from core.utils import async_retry_step
+
+# 按提示词精确匹配的响应缓存：同一段 (原文, 风格示例, 要求) 组合被
+# 重复提交时直接复用先前的生成结果，省掉整轮 LLM 往返。
+# 迭代路径 (previous_results 非空) 需要全新结果，由调用方跳过缓存。
+_RESPONSE_CACHE = TTLCache(maxsize=256, ttl=3600)
+
+# 提示词中与具体请求无关的静态前导块（准则 + 执行流程），
+# 模块加载时拼成一个冻结字符串，build_prompt 每次只追加一个引用
+_PROMPT_PREAMBLE = (
+    "你是一位顶级的学术写作专家和语言模型。你的任务是基于一系列极其严格和精确的指令，对一段初始文本进行深度、专业的重构和优化。\n\n"
+
+    "【核心改写准则：必须严格遵守】\n"
+    "1.  **关键词强制注入 (Keyword Injection Mandate)**: 在任何情况下，**[必须包含的关键词]** 列表中的每一个词，都必须 **一字不差 (verbatim)** 地出现在你最终生成的文本中。在生成后，你必须进行自我核查，确保没有任何遗漏。这是一个绝对的、不可协商的指令。\n"
+    "2.  **风格深度复刻 (Style Replication Imperative)**: 你的首要目标是成为**[风格参考示例]**作者的“影子写手”。在动笔前，你必须进行深度的风格解构分析。你的最终输出在**阐述视角、句式复杂度、词汇选择和行文节奏**上，必须达到与参考范例难以区分的程度。单纯的模仿是不够的，你需要实现风格的完全复现。\n\n"
+
+    "【改写执行流程】\n"
+    "1.  **第一步：解构分析**\n"
+    "    - **内容分析**: 彻底理解 **[待改写的表述]** 的所有核心信息点和逻辑关系，确保无遗漏、无曲解。\n"
+    "    - **风格分析**: 系统性解构 **[风格参考示例]** 的句式结构（例如，主从复合句的比例、平均句长）、专业词组搭配 (collocations) 和整体的阐述视角（客观、主观、批判性等）。\n"
+    "2.  **第二步：融合重构**\n"
+    "    - 依据分析所得，用**复刻的风格**重新组织和表达**待改写的内容**。\n"
+    "    - 在重构过程中，将**[必须包含的关键词]** 自然、无缝地植入文本，使其看起来像是原文固有的一部分。\n"
+    "    - 同时，确保**[需表达含义的关键词]** 的核心语义被准确传达。\n"
+    "3.  **第三步：最终校验**\n"
+    "    - **检查关键词**: 回溯检查，确认所有**[必须包含的关键词]**都已一字不差地包含在内。\n"
+    "    - **比对风格**: 将你的草稿与**[风格参考示例]**并排比对，评估风格的一致性。如果不达标，返回第二步进行修改。\n\n"
+
+    "---【输入材料清单】---\n"
+)
+
+def _balanced_json_slice(text: str) -> Optional[str]:
+    """从 text 中提取第一个配平的 JSON 数组/对象子串。
+
+    用栈跟踪括号层级（跳过字符串字面量内部），若扫描到结尾仍未配平，
+    视为输出被截断，按未闭合层级补全右括号后返回。找不到起点返回 None。
+    """
+    start = next((i for i, ch in enumerate(text) if ch in '[{'), None)
+    if start is None:
+        return None
+    stack = []
+    in_str = esc = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == '\\':
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in '[{':
+            stack.append(']' if ch == '[' else '}')
+        elif ch in ']}':
+            if stack and ch == stack[-1]:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1]
+    completed = text[start:]
+    if in_str:
+        completed += '"'
+    return completed + ''.join(reversed(stack))
+
+def _recover_json(text: str):
+    """分级恢复 LLM 返回的 JSON，尽量避免因可修复的噪声触发整轮重试。
+
+    依次尝试：原文直接解析 -> 剥掉 ``` 代码块围栏 -> 提取/补全第一个
+    配平的 JSON 子串。全部失败时抛 ValueError。
+    """
+    text = text.strip()
+    candidates = [text]
+    if text.startswith("```"):
+        body = text[3:]
+        if body.startswith("json"):
+            body = body[4:]
+        body = body.strip()
+        if body.endswith("```"):
+            body = body[:-3].strip()
+        candidates.append(body)
+    sliced = _balanced_json_slice(candidates[-1])
+    if sliced is not None:
+        candidates.append(sliced)
+    for candidate in candidates:
+        try:
+            return orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            continue
+    raise ValueError("LLM 返回了无效的JSON格式。")
+
+def build_prompt(original_text: str, must_include_keywords: Optional[List[str]], reference_keywords: Optional[List[str]], style_requirements: Optional[List[str]], style_example: Optional[str], previous_results: Optional[List[str]] = None, mode = None, single_output: bool = False) -> str:
+    """构建用于文本润色的详细提示词 (版本 2.0)。
+
+    用列表累积 + 一次 join 拼装，替代原先十几次字符串 +=（每次 +=
+    都要重新分配整个字符串，总开销 O(n^2)）。
+    """
+    parts = [
+        _PROMPT_PREAMBLE,
+        f"1. **[待改写的表述]**:\n   - {original_text}\n\n",
+    ]
+
     if must_include_keywords:
-        prompt += f"2. **[必须包含的关键词]** (必须一字不差地、自然地嵌入到改写后的文本中):\n"
-        for keyword in must_include_keywords:
-            prompt += f"   - `{keyword}`\n"
-        prompt += "\n"
+        parts.append("2. **[必须包含的关键词]** (必须一字不差地、自然地嵌入到改写后的文本中):\n")
+        parts.append("".join(f"   - `{keyword}`\n" for keyword in must_include_keywords))
+        parts.append("\n")
 
     if reference_keywords:
-        prompt += f"3. **[需表达含义的关键词]** (不必直接使用原词，但必须准确、完整地传达其核心语义):\n"
-        for keyword in reference_keywords:
-            prompt += f"   - {keyword}\n"
-        prompt += "\n"
+        parts.append("3. **[需表达含义的关键词]** (不必直接使用原词，但必须准确、完整地传达其核心语义):\n")
+        parts.append("".join(f"   - {keyword}\n" for keyword in reference_keywords))
+        parts.append("\n")
 
     if style_requirements:
-        prompt += f"4. **[风格要求]**:\n"
-        for style in style_requirements:
-            prompt += f"   - {style}\n"
-        prompt += "\n"
+        parts.append("4. **[风格要求]**:\n")
+        parts.append("".join(f"   - {style}\n" for style in style_requirements))
+        parts.append("\n")
 
     if style_example:
-        prompt += f"5. **[风格参考示例]** (请深度分析并模仿其阐述视角、句式结构和词组搭配):\n"
-        prompt += f"   - \"{style_example}\"\n\n"
-        
-    prompt += "---【输出指令】---\n"
-    
+        parts.append("5. **[风格参考示例]** (请深度分析并模仿其阐述视角、句式结构和词组搭配):\n")
+        parts.append(f"   - \"{style_example}\"\n\n")
+
+    parts.append("---【输出指令】---\n")
+
     if previous_results:
-        prompt += "你之前已经生成了以下版本，请在本次生成中提供一个与之前版本**截然不同**的、全新的、创新的版本。\n"
-        prompt += "[之前已生成的版本]:\n"
-        for i, result in enumerate(previous_results):
-            prompt += f"{i+1}. {result}\n"
-        prompt += "\n"
-        prompt += "请严格遵循上述所有要求，只输出一个**新**的、经过润色的文本版本。不要包含任何解释或代码块标记。"
+        parts.append("你之前已经生成了以下版本，请在本次生成中提供一个与之前版本**截然不同**的、全新的、创新的版本。\n")
+        parts.append("[之前已生成的版本]:\n")
+        parts.append("".join(f"{i+1}. {result}\n" for i, result in enumerate(previous_results)))
+        parts.append("\n")
+        parts.append("请严格遵循上述所有要求，只输出一个**新**的、经过润色的文本版本。不要包含任何解释或代码块标记。")
+    elif single_output:
+        parts.append("请严格遵循上述所有要求，只输出一个经过润色的文本版本。不要包含任何解释或代码块标记。")
     else:
         num_results = "3到5个"
-        prompt += f"请严格遵循上述所有要求，生成 **{num_results}** 个经过润色的、风格各异的文本版本。请以JSON格式的列表形式返回，列表中每个元素都是一个完整的文本字符串。例如：[\"完整的改写结果1\", \"完整的改写结果2\", ...]。不要添加任何解释或代码块标记。"
+        parts.append(f"请严格遵循上述所有要求，生成 **{num_results}** 个经过润色的、风格各异的文本版本。请以JSON格式的列表形式返回，列表中每个元素都是一个完整的文本字符串。例如：[\"完整的改写结果1\", \"完整的改写结果2\", ...]。不要添加任何解释或代码块标记。")
+
+    return "".join(parts)
 
-    return prompt
+def _format_original_requirements(request_params: dict) -> str:
+    """把请求参数格式化成 [原始要求] 块，供挑选/建议两个提示词共用。
+
+    只拼一次避免两处手写块慢慢漂移；放在两个提示词的开头，同一次
+    运行内第二个调用可以命中服务端的前缀缓存。
+    """
+    return (
+        "[原始要求]\n"
+        f"- 原始表述: {request_params['original_text']}\n"
+        f"- 必须包含的关键词: {request_params.get('must_include_keywords')}\n"
+        f"- 参考关键词: {request_params.get('reference_keywords')}\n"
+        f"- 风格要求: {request_params.get('style_requirements')}\n"
+        f"- 风格参考示例: {request_params.get('style_example')}"
+    )
+
+@async_retry_step
+async def call_llm_for_style_transfer(prompt: str, is_json: bool = False, cacheable: bool = True,
+                                      temperature: float = 0.4, seed: Optional[int] = None,
+                                      max_tokens: int = 4096, on_delta=None,
+                                      model: str = MODEL_NAME) -> any:
+    """调用LLM进行风格转换，并根据需要解析JSON。
+
+    cacheable=True 时按提示词精确匹配缓存解析后的结果；要求每次都
+    产出新内容的调用（如专业模式的并发轮次）应传 cacheable=False。
+    temperature/seed 供并发生成时制造多样性；max_tokens 按调用点
+    预期的输出规模设定，限制解码耗时和费用。
+
+    判别型调用（挑选/建议）可通过 model 换用更小的模型，
+    模型名会一并纳入缓存键，不同模型的结果互不串缓存。
+
+    传入 on_delta 回调时文本响应改用流式生成，每收到一段增量就回调
+    一次，调用方可以把部分结果实时暴露给轮询状态的前端。
+    """
+    cache_key = None
+    if cacheable:
+        cache_key = hashlib.sha256(
+            f"{model}|{is_json}|{temperature}|{seed}|{max_tokens}|{prompt}".encode()
+        ).hexdigest()
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            logging.info("润色响应命中缓存，跳过 LLM 请求。")
+            return list(cached) if isinstance(cached, list) else cached
 
-@retry_step
-def call_llm_for_style_transfer(prompt: str, is_json: bool = False) -> any:
-    """调用LLM进行风格转换，并根据需要解析JSON"""
     logging.info("正在与 LLM 交互进行文本润色...")
-    
+
     response_format = {"type": "json_object"} if is_json else {"type": "text"}
 
-    response = client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.4,
-        response_format=response_format
-    )
-    
-    content = response.choices[0].message.content.strip()
+    async with OPENAI_SEMAPHORE:
+        if on_delta is not None and not is_json:
+            stream = await aclient.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                seed=seed,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                stream=True
+            )
+            pieces = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    pieces.append(delta)
+                    on_delta(delta)
+            content = "".join(pieces).strip()
+        else:
+            response = await aclient.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                seed=seed,
+                max_tokens=max_tokens,
+                response_format=response_format
+            )
+            content = response.choices[0].message.content.strip()
     logging.info(f"LLM Response (raw): {content[:500]}...")
 
     if is_json:
         try:
-            # 兼容处理LLM可能返回的被```json ... ```包裹的响应
-            if content.startswith("```json"):
-                content = content[7:-3].strip()
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            logging.error(f"LLM did not return valid JSON: {e}")
-            # 尝试从非标准格式中挽救数据，例如纯文本列表
-            if '[' in content and ']' in content:
-                logging.warning("Attempting to salvage list from malformed JSON.")
-                try:
-                    # 这是一个简单的挽救尝试，可能需要更复杂的解析
-                    salvaged_content = content[content.find('['):content.rfind(']')+1]
-                    return json.loads(salvaged_content)
-                except json.JSONDecodeError:
-                    logging.error("Salvage attempt failed.")
-            raise ValueError("LLM 返回了无效的JSON格式。")
+            result = _recover_json(content)
+        except ValueError:
+            logging.error(f"LLM did not return recoverable JSON: {content[:200]}...")
+            raise
     else:
-        return content
+        result = content
+
+    if cache_key is not None:
+        _RESPONSE_CACHE[cache_key] = result
+    # 列表结果返回浅拷贝，避免调用方的修改污染缓存条目
+    return list(result) if isinstance(result, list) else result
 
 
-def run_style_transfer_logic(run_id: str, request_params: dict):
+async def run_style_transfer_logic(run_id: str, request_params: dict):
     """
     执行文本润色任务的主逻辑。
     """
     process_log = style_transfer_tasks[run_id]['summary']
     mode = request_params.get("mode", "标准")
-    
+
     try:
+        # 挑选和建议两个提示词共用同一个 [原始要求] 前缀，只格式化一次
+        orig_req_block = _format_original_requirements(request_params)
+
         if mode == "专业":
             process_log.append(f"INFO: 已启动【专业模式】，将执行 7+1 轮 LLM 调用。")
-            style_transfer_tasks[run_id]['summary'] = process_log
-            
-            # 1. 迭代生成7个结果
-            generated_results = []
-            for i in range(7):
-                process_log.append(f"INFO: 正在进行第 {i+1}/7 轮迭代生成...")
-                style_transfer_tasks[run_id]['summary'] = process_log
-                
-                prompt = build_prompt(previous_results=generated_results, **request_params)
-                new_result = call_llm_for_style_transfer(prompt, is_json=False)
-                generated_results.append(new_result)
-                process_log.append(f"SUCCESS: 第 {i+1} 轮生成完成。")
-                style_transfer_tasks[run_id]['summary'] = process_log
+
+            # 1. 并发生成7个结果。旧实现串行迭代，把之前的结果塞回提示词
+            # 来避免重复，7 轮就是 7 个完整的 LLM 往返；改为同一提示词
+            # 配上递增的 temperature 和不同的 seed 并发生成，多样性由
+            # 采样参数保证，墙钟时间从 7xRTT 降到约 1xRTT
+            process_log.append("INFO: 正在并发执行 7 轮生成 (不同 temperature/seed)...")
+
+            prompt = build_prompt(single_output=True, **request_params)
+
+            # 各轮的部分输出实时累积到 stream_buffer，轮询状态的前端
+            # 在生成期间即可看到逐渐增长的文本，而不是干等总时长
+            stream_buffer = ["" for _ in range(7)]
+            style_transfer_tasks[run_id]['stream_buffer'] = stream_buffer
+
+            def _make_on_delta(index):
+                def _on_delta(delta):
+                    stream_buffer[index] += delta
+                return _on_delta
+
+            generated_results = list(await asyncio.gather(*[
+                call_llm_for_style_transfer(
+                    prompt, is_json=False, cacheable=False,
+                    temperature=0.3 + 0.1 * i, seed=i, max_tokens=1500,
+                    on_delta=_make_on_delta(i)
+                )
+                for i in range(7)
+            ]))
+            style_transfer_tasks[run_id].pop('stream_buffer', None)
+            process_log.append("SUCCESS: 7 轮并发生成全部完成。")
 
             # 2. LLM挑选最佳4个
-            process_log.append("INFO: 7轮迭代完成，正在调用 LLM 挑选最佳的4个结果...")
-            style_transfer_tasks[run_id]['summary'] = process_log
+            process_log.append("INFO: 7轮生成完成，正在调用 LLM 挑选最佳的4个结果...")
             
-            selection_prompt = f"""
-你是一位资深的文本编辑和评论家。这里有7个基于相同要求润色后的文本版本。请仔细评估它们，并选出其中**最优秀、最符合要求、且风格差异最明显**的4个版本。
+            candidates_block = "\n".join(
+                f'--- 版本 {i+1} ---\n"{res}"' for i, res in enumerate(generated_results)
+            )
+            selection_prompt = f"""{orig_req_block}
 
-[原始要求]
-- 原始表述: {request_params['original_text']}
-- 必须包含的关键词: {request_params.get('must_include_keywords')}
-- 风格要求: {request_params.get('style_requirements')}
-- 风格参考示例: {request_params.get('style_example')}
+你是一位资深的文本编辑和评论家。这里有7个基于上述要求润色后的文本版本。请仔细评估它们，并选出其中**最优秀、最符合要求、且风格差异最明显**的4个版本。
 
 [7个候选版本]
-{chr(10).join(f'--- 版本 {i+1} ---\n"{res}"' for i, res in enumerate(generated_results))}
+{candidates_block}
 
 请严格按照以下格式返回一个JSON列表，列表中包含你选出的4个版本的**完整原始文本**。
 **输出格式示例**:
 ["这里是版本A的完整文本内容...", "这里是版本B的完整文本内容...", "这里是版本C的完整文本内容...", "这里是版本D的完整文本内容..."]
 不要添加任何解释、序号或代码块标记。只输出纯粹的JSON列表。
 """
-            final_results_raw = call_llm_for_style_transfer(selection_prompt, is_json=True)
+            # 挑选是判别性任务而非创作，压低 temperature 让同样的候选集
+            # 得到稳定的选择，重跑时也更容易命中响应缓存
+            final_results_raw = await call_llm_for_style_transfer(
+                selection_prompt, is_json=True, temperature=0.2,
+                model=SUGGESTIONS_MODEL_NAME
+            )
             
             # --- 鲁棒性处理逻辑 ---
             final_results = []
@@ -188,47 +338,48 @@ def run_style_transfer_logic(run_id: str, request_params: dict):
                     process_log.append("ERROR: 无法解析LLM的选择，默认选用前4个结果。")
                     final_results = generated_results[:4]
 
-            style_transfer_tasks[run_id]['summary'] = process_log
 
         else: # 标准模式
             process_log.append(f"INFO: 已启动【标准模式】，将执行 1 轮 LLM 调用。")
-            style_transfer_tasks[run_id]['summary'] = process_log
             
             prompt = build_prompt(**request_params)
-            final_results = call_llm_for_style_transfer(prompt, is_json=True)
+            final_results = await call_llm_for_style_transfer(prompt, is_json=True)
             if not isinstance(final_results, list):
                  raise ValueError("LLM未能返回结果列表。")
 
             process_log.append(f"SUCCESS: LLM 已生成 {len(final_results)} 条润色结果。")
-            style_transfer_tasks[run_id]['summary'] = process_log
         
         # 3. LLM生成修改建议
         process_log.append("INFO: 正在调用 LLM 为最终结果生成修改建议...")
-        style_transfer_tasks[run_id]['summary'] = process_log
-        
-        suggestions_prompt = f"""
-你是一位乐于助人的写作助理。这里有几条由AI润色后的文本。请你站在用户的角度，检查这些结果是否完全符合原始要求，并提供一小段精炼的、可操作的修改建议。
 
-[原始要求]
-- 原始表述: {request_params['original_text']}
-- 必须包含的关键词: {request_params.get('must_include_keywords')}
-- 参考关键词: {request_params.get('reference_keywords')}
-- 风格要求: {request_params.get('style_requirements')}
-- 风格参考示例: {request_params.get('style_example')}
+        results_block = "\n".join(f'- {res}' for res in final_results)
+        suggestions_prompt = f"""{orig_req_block}
+
+你是一位乐于助人的写作助理。这里有几条由AI润色后的文本。请你站在用户的角度，检查这些结果是否完全符合上述原始要求，并提供一小段精炼的、可操作的修改建议。
 
 [最终润色结果]
-{chr(10).join(f'- {res}' for res in final_results)}
+{results_block}
 
 请根据以上信息，生成一小段文本提示，指出这些结果中可能存在的、需要用户手动微调的问题（例如：某个必须包含的关键词是否自然融入？风格是否完全对齐？），并给出修改建议。你的回答应该是直接面向用户的、友好的文本。
 """
-        suggestions = call_llm_for_style_transfer(suggestions_prompt, is_json=False)
+        # 建议文本同样流式生成，轮询端在这一阶段也能看到增量输出
+        suggestions_buffer = [""]
+        style_transfer_tasks[run_id]['stream_buffer'] = suggestions_buffer
+
+        def _on_suggestion_delta(delta):
+            suggestions_buffer[0] += delta
+
+        suggestions = await call_llm_for_style_transfer(
+            suggestions_prompt, is_json=False, max_tokens=1024, temperature=0.2,
+            on_delta=_on_suggestion_delta, model=SUGGESTIONS_MODEL_NAME
+        )
+        style_transfer_tasks[run_id].pop('stream_buffer', None)
         process_log.append("SUCCESS: LLM 已生成修改建议。")
         
         # 4. 任务完成
         process_log.append("🎉 SUCCESS: 文本润色任务成功完成！")
         style_transfer_tasks[run_id].update({
             "status": "completed",
-            "summary": process_log,
             "result": {
                 "results": final_results,
                 "suggestions": suggestions
@@ -238,5 +389,5 @@ def run_style_transfer_logic(run_id: str, request_params: dict):
     except Exception as e:
         logging.error(f"Run ID {run_id}: 处理过程中发生致命错误: {e}", exc_info=True)
         process_log.append(f"❌ FATAL_ERROR: {e}")
-        style_transfer_tasks[run_id].update({"status": "failed", "summary": process_log})
+        style_transfer_tasks[run_id].update({"status": "failed"})
 
@@ -1,3 +1,5 @@
+import asyncio
+import random
 import time
 import logging
 import shutil
@@ -6,6 +8,11 @@ import os
 
 from config import MAX_RETRIES, log_dir
 
+def _backoff_seconds(attempt: int) -> float:
+    """第 attempt 次失败后的等待秒数：指数退避 (1s, 2s, 4s, ...，上限 30s)
+    加 0-1 秒随机抖动，避免并发任务的重试在同一时刻扎堆。"""
+    return min(2 ** attempt, 30) + random.random()
+
 def retry_step(func):
     """一个装饰器，用于为关键步骤添加重试逻辑"""
     def wrapper(*args, **kwargs):
@@ -16,25 +23,51 @@ def retry_step(func):
                 return func(*args, **kwargs)
             except Exception as e:
                 last_exception = e
-                logging.warning(f"[Retry] 步骤 '{func.__name__}' 第 {attempt + 1}/{MAX_RETRIES} 次尝试失败: {e}。将在 2 秒后重试...")
-                time.sleep(2)
+                delay = _backoff_seconds(attempt)
+                logging.warning(f"[Retry] 步骤 '{func.__name__}' 第 {attempt + 1}/{MAX_RETRIES} 次尝试失败: {e}。将在 {delay:.1f} 秒后重试...")
+                time.sleep(delay)
+        logging.error(f"[Failed] 步骤 '{func.__name__}' 在 {MAX_RETRIES} 次尝试后最终失败。")
+        raise last_exception
+    return wrapper
+
+def async_retry_step(func):
+    """retry_step 的异步版本，重试等待用 asyncio.sleep，不阻塞事件循环"""
+    async def wrapper(*args, **kwargs):
+        last_exception = None
+        for attempt in range(MAX_RETRIES):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                last_exception = e
+                delay = _backoff_seconds(attempt)
+                logging.warning(f"[Retry] 步骤 '{func.__name__}' 第 {attempt + 1}/{MAX_RETRIES} 次尝试失败: {e}。将在 {delay:.1f} 秒后重试...")
+                await asyncio.sleep(delay)
         logging.error(f"[Failed] 步骤 '{func.__name__}' 在 {MAX_RETRIES} 次尝试后最终失败。")
         raise last_exception
     return wrapper
 
 def get_dir_size(path='.'):
-    """计算目录的总大小"""
-    import os
+    """计算目录的总大小。
+
+    用显式栈迭代遍历，替代原先的逐目录递归调用：没有 Python 函数帧
+    开销，scandir 的 DirEntry 自带 stat 缓存，整个过程每个条目只有
+    一次系统调用。单个目录读取失败时跳过而不是让整个统计报错。
+    """
     total = 0
-    path = Path(path)
-    if not path.exists():
-        return 0
-    with os.scandir(path) as it:
-        for entry in it:
-            if entry.is_file():
-                total += entry.stat().st_size
-            elif entry.is_dir():
-                total += get_dir_size(entry.path)
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                        elif entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
     return total
 
 def get_system_status():
@@ -1,9 +1,18 @@
+try:
+    # libuv 实现的事件循环，对 IO 密集的翻译/转换流水线有数倍加速；
+    # Windows 本地开发环境没有 uvloop 时回退到默认循环
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from api import arxiv_search, format_convert, admin, style_transfer
-from config import setup_logging
+from config import setup_logging, stop_logging, aclient
 
 # --- 初始化 ---
 # 配置日志
@@ -13,7 +22,9 @@ setup_logging()
 app = FastAPI(
     title="LaTeX Format Converter API",
     description="Do It by Agent",
-    version="2.3.0"
+    version="2.3.0",
+    # 状态轮询接口的 summary 列表可能有数百行日志，orjson 序列化比标准库快数倍
+    default_response_class=ORJSONResponse
 )
 
 # --- 中间件配置 ---
@@ -41,6 +52,13 @@ app.include_router(admin.router)
 app.include_router(style_transfer.router) 
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    """关闭共享的 OpenAI 客户端，并停止日志监听线程"""
+    await aclient.close()
+    stop_logging()
+
+
 @app.get("/", tags=["Root"])
 def read_root():
     return {"message": "Welcome to the DIA Agent API. Visit /docs for API documentation."}
@@ -52,4 +70,7 @@ if __name__ == "__main__":
     print("启动 DIA Agent Web 服务 (版本 2.1)...")
     print("访问 http://127.0.0.1:8000/docs 查看 API 文档和进行测试。")
     print("="*60)
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # 事件循环已在模块顶部装上 uvloop；httptools 的 C 实现 HTTP 解析
+    # 比默认的 h11 快数倍，对大文件上传的请求解析尤其明显。
+    # 任务状态存在进程内，不能开多 worker。
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, http="httptools")
\ No newline at end of file